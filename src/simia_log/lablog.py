@@ -2,7 +2,9 @@
 import argparse
 import json
 import os
+import re
 import shutil
+import time
 from datetime import datetime
 from html import escape
 from pathlib import Path
@@ -59,6 +61,20 @@ DEFAULT_CONFIG = {
 
 IS_WINDOWS = os.name == "nt"
 
+# Appended event lines are pushed to disk after this many lines, or once this
+# many seconds have passed since the last flush (whichever comes first).
+FLUSH_EVERY_LINES = 16
+FLUSH_EVERY_SECONDS = 0.5
+
+# Byte translation table for Logger.sanitize: allowed ASCII maps to itself,
+# everything else (including the '?' that non-ASCII encodes to) becomes '_'.
+SANITIZE_ALLOWED = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_. "
+_SANITIZE_TABLE = bytes(c if chr(c) in SANITIZE_ALLOWED else ord("_") for c in range(256))
+
+REC_START_RE = re.compile(r"REC (\d+) START")
+LIQUID_RE = re.compile(r"LIQUID:\s*([0-9]+(?:\.[0-9]+)?)")
+TRIALS_RE = re.compile(r"\[(\d+)\s*/\s*(\d+)\]")
+
 
 def normalize_config(cfg):
     merged = json.loads(json.dumps(DEFAULT_CONFIG))
@@ -632,8 +648,6 @@ def export_logs(config):
 
 def compute_session_summary(entries):
     """Tally a session's log lines into headline numbers for an end-of-day recap."""
-    import re
-
     recordings = 0
     liquid_ml = 0.0
     tasks = 0
@@ -646,17 +660,17 @@ def compute_session_summary(entries):
         s = line.strip()
         up = s.upper()
 
-        rec = re.search(r"REC (\d+) START", up)
+        rec = REC_START_RE.search(up)
         if rec:
             recordings = max(recordings, int(rec.group(1)))
         if "LIQUID:" in up:
-            amount = re.search(r"LIQUID:\s*([0-9]+(?:\.[0-9]+)?)", up)
+            amount = LIQUID_RE.search(up)
             if amount:
                 liquid_ml += float(amount.group(1))
         if "START TASK:" in up:
             tasks += 1
         if "STOP TASK:" in up:
-            trial = re.search(r"\[(\d+)\s*/\s*(\d+)\]", s)
+            trial = TRIALS_RE.search(s)
             if trial:
                 trials_success += int(trial.group(1))
                 trials_fail += int(trial.group(2))
@@ -679,7 +693,9 @@ class Logger:
     def __init__(self, config_path: Path):
         self.config_path = config_path
         self.config, self.config_loaded = load_config(config_path)
-        self.entries = []
+        self.index_config()
+        self.header_entries = []
+        self.event_entries = []
         self.event_line_counts = []
         self.file_path = None
         self.session_started = False
@@ -689,16 +705,34 @@ class Logger:
         self.session_date = ""
         self.session_started_at = ""
         self.copy_target_root = None
+        self._fp = None
+        self._dirty_count = 0
+        self._last_flush = 0.0
+
+    @property
+    def entries(self):
+        return self.header_entries + self.event_entries
+
+    def _timestamps(self):
+        sec = int(time.time())
+        if sec != self._ts_cache[0]:
+            now = datetime.fromtimestamp(sec)
+            self._ts_cache = (
+                sec,
+                now.strftime(self._ts_fmt),
+                now.strftime(self._ts_short_fmt),
+            )
+        return self._ts_cache
 
     def ts(self):
-        return datetime.now().strftime(self.config["timestamp_format"])
+        return self._timestamps()[1]
 
     def tshort(self):
-        return datetime.now().strftime(self.config["line_time_format"])
+        return self._timestamps()[2]
 
     def sanitize(self, s: str):
-        allowed = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_. "
-        cleaned = "".join(c if c in allowed else "_" for c in s.strip())
+        raw = s.strip().encode("ascii", "replace")
+        cleaned = raw.translate(_SANITIZE_TABLE).decode("ascii")
         cleaned = cleaned.strip().replace(" ", "_")
         return cleaned or "unknown"
 
@@ -723,11 +757,7 @@ class Logger:
         return lines
 
     def rebuild_header(self):
-        events = []
-        if "## Events" in self.entries:
-            idx = self.entries.index("## Events")
-            events = self.entries[idx + 1 :]
-        self.entries = self.build_header() + events
+        self.header_entries = self.build_header()
         self.write_all()
 
     def get_session_fields(self):
@@ -873,21 +903,58 @@ class Logger:
         return None
 
     def write_all(self):
+        """Rewrite the whole file; only needed when earlier lines change (undo, header edits)."""
         if not self.file_path:
             return
-        with self.file_path.open("w", encoding="utf-8") as f:
-            f.write("\n".join(self.entries) + "\n")
-
-    def append_entry(self, text: str):
-        lines = self.render_entry_lines(text)
-        self.entries.extend(lines)
+        self.close_file()
+        with self.file_path.open("w", encoding="utf-8", buffering=65536) as f:
+            f.writelines(line + "\n" for line in self.header_entries)
+            f.writelines(line + "\n" for line in self.event_entries)
+        self.open_file()
+
+    def open_file(self):
+        self.close_file()
+        if self.file_path:
+            self._fp = self.file_path.open("a", encoding="utf-8", buffering=65536)
+            self._last_flush = time.monotonic()
+
+    def close_file(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+        self._dirty_count = 0
+
+    def flush(self):
+        if self._fp is not None and self._dirty_count:
+            self._fp.flush()
+        self._dirty_count = 0
+        self._last_flush = time.monotonic()
+
+    def append_line(self, line: str):
+        if self._fp is None:
+            self.open_file()
+            if self._fp is None:
+                return
+        self._fp.write(line + "\n")
+        self._dirty_count += 1
+        if (
+            self._dirty_count >= FLUSH_EVERY_LINES
+            or time.monotonic() - self._last_flush > FLUSH_EVERY_SECONDS
+        ):
+            self.flush()
+
+    def append_entry(self, text: str, upper=None):
+        lines = self.render_entry_lines(text, upper)
+        self.event_entries.extend(lines)
         self.event_line_counts.append(len(lines))
-        self.write_all()
+        for line in lines:
+            self.append_line(line)
         return lines
 
-    def render_entry_lines(self, text: str):
+    def render_entry_lines(self, text: str, upper=None):
         ts = self.tshort()
-        upper = text.strip().upper()
+        if upper is None:
+            upper = text.strip().upper()
         if upper == "START RECORDING":
             self.recording_index += 1
             return self.wrap_standalone_line(f"[{ts}] >>> REC {self.recording_index} START >>>")
@@ -905,7 +972,8 @@ class Logger:
 
     def wrap_standalone_line(self, line: str):
         lines = []
-        if self.entries and self.entries[-1] != "":
+        tail = self.event_entries or self.header_entries
+        if tail and tail[-1] != "":
             lines.append("")
         lines.append(line)
         lines.append("")
@@ -923,8 +991,8 @@ class Logger:
     def undo(self):
         if self.event_line_counts:
             count = self.event_line_counts.pop()
-            removed = self.entries[-count:]
-            del self.entries[-count:]
+            removed = self.event_entries[-count:]
+            del self.event_entries[-count:]
             self.write_all()
             return removed
         return None
@@ -932,15 +1000,32 @@ class Logger:
     def stop(self):
         lines = self.append_entry("SESSION END")
         self.session_started = False
+        self.close_file()
         return lines
 
+    def index_config(self):
+        """Precompute per-keystroke lookups (macros, timestamp formats) from the config."""
+        self._ts_fmt = self.config["timestamp_format"]
+        self._ts_short_fmt = self.config["line_time_format"]
+        # (epoch second, ts() string, tshort() string); both formats have
+        # second resolution, so a burst of entries reuses one strftime pair.
+        self._ts_cache = (0, "", "")
+
+        macro_index = {}
+        for m in self.config.get("macros", []):
+            text = m.get("text") or m.get("label") or ""
+            macro_index.setdefault(str(m.get("key", "")), (text, text.strip().upper()))
+        self.macro_index = macro_index
+
     def reload_config(self):
         self.config, self.config_loaded = load_config(self.config_path)
+        self.index_config()
 
     def save_config(self, new_config=None):
         """Persist the config (optionally replacing it first) and re-normalize."""
         if new_config is not None:
             self.config = normalize_config(new_config)
+            self.index_config()
         save_config(self.config_path, self.config)
         self.config_loaded = True
 
@@ -965,9 +1050,10 @@ class Logger:
     # --- UI-free session lifecycle (driven by the Textual app) ---
 
     def begin_new_session(self, session_data, copy_target_root):
+        now = datetime.now()
         self.session_data = dict(session_data or {})
-        self.session_date = datetime.now().strftime("%Y-%m-%d")
-        self.session_started_at = self.tshort()
+        self.session_date = now.strftime("%Y-%m-%d")
+        self.session_started_at = now.strftime(self._ts_short_fmt)
         self.copy_target_root = copy_target_root or None
         self.recording_index = 0
         self.current_task = None
@@ -975,19 +1061,18 @@ class Logger:
 
         animal_id = self.session_data.get("animal_id", "")
         animal_part = self.sanitize(animal_id) if animal_id else "animal"
-        file_date = datetime.now().strftime("%y%m%d")
+        file_date = now.strftime("%y%m%d")
         out_dir = self.ensure_output_dir()
         base_path = out_dir / f"{file_date}_{animal_part}.md"
         self.file_path = self.next_available_path(base_path)
 
-        self.entries = self.build_header()
+        self.header_entries = self.build_header()
+        self.event_entries = []
         self.write_all()
         self.session_started = True
         return self.file_path
 
     def resume_session(self, path: Path, copy_target_root):
-        import re
-
         session = parse_log_file(path)
         if session is None:
             return None
@@ -997,9 +1082,17 @@ class Logger:
             return None
 
         self.file_path = path
-        self.entries = [line.rstrip("\r\n") for line in lines]
+        lines = [line.rstrip("\r\n") for line in lines]
+        if "## Events" in lines:
+            idx = lines.index("## Events") + 1
+        else:
+            idx = len(lines)
+        self.header_entries = lines[:idx]
+        self.event_entries = lines[idx:]
         self.copy_target_root = copy_target_root or None
         self.event_line_counts = []
+        # Normalize line endings once; later events are appended.
+        self.write_all()
 
         header = session["header"]
         data = {}
@@ -1014,7 +1107,7 @@ class Logger:
 
         max_rec = 0
         for event in session["events"]:
-            match = re.search(r"REC (\d+) START", event)
+            match = REC_START_RE.search(event)
             if match:
                 max_rec = max(max_rec, int(match.group(1)))
         self.recording_index = max_rec
@@ -1047,10 +1140,7 @@ class Logger:
         self.rebuild_header()
 
     def event_section_lines(self):
-        if "## Events" in self.entries:
-            idx = self.entries.index("## Events")
-            return self.entries[idx + 1 :]
-        return []
+        return list(self.event_entries)
 
     # --- UI-free external copy ---
 
@@ -1074,6 +1164,7 @@ class Logger:
             except Exception as exc:
                 return {"status": "error", "message": f"Could not create folder: {exc}"}
         target_path = folder / self.file_path.name
+        self.flush()
         try:
             shutil.copy2(self.file_path, target_path)
         except Exception as exc:
@@ -9,7 +9,9 @@ work), a startup wizard (new session or continue an existing log), and a way to
 correct the current recording number.
 """
 
+import copy
 import time
+import traceback
 from pathlib import Path
 
 from rich.markup import escape
@@ -107,6 +109,12 @@ IDLE_SECONDS = 90
 # How long a one-off reaction (juice!) lingers before reverting to base mood.
 FLASH_SECONDS = 4
 
+# Shown in the event pane until the first real entry arrives.
+EMPTY_LOG_PLACEHOLDER = (
+    f"[{RP['muted']}]  No events yet — your actions will appear here. "
+    f"Press [b]h[/b] for help.[/]"
+)
+
 
 def summary_face(summary: dict) -> str:
     """Pick a monkey face for the end-of-session summary based on how it went."""
@@ -577,8 +585,6 @@ class SettingsScreen(ModalScreen[bool]):
         return targets
 
     def _save(self) -> None:
-        import copy
-
         cfg = copy.deepcopy(self.logger.config)
         cfg.setdefault("field_options", {})
         cfg.setdefault("field_defaults", {})
@@ -844,6 +850,8 @@ class LoggingScreen(Screen):
         self._last_activity = 0.0
         self._flash_key = None
         self._flash_until = 0.0
+        self._dispatch = {}
+        self._help_text = ""
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
@@ -864,6 +872,7 @@ class LoggingScreen(Screen):
         self._task_active = bool(self.logger.current_task)
         if self._clock_timer is None:
             self._clock_timer = self.set_interval(1.0, self._tick)
+        self.build_dispatch()
         self.refresh_status()
         self.refresh_hint()
         self.refresh_mood()
@@ -904,6 +913,7 @@ class LoggingScreen(Screen):
     # -- the monkey's mood --------------------------------------------------- #
 
     def _tick(self) -> None:
+        self.logger.flush()
         self.refresh_status()
         self.refresh_mood()
 
@@ -958,16 +968,15 @@ class LoggingScreen(Screen):
             f"[b]{cfg.get('stop_key', 'q')}[/] end"
         )
         self.query_one("#hintbar", Static).update(f"{macro_bits}\n{keys}")
+        # The help text only changes with the config, so build it alongside the hint.
+        self._help_text = self._build_help_text()
 
     def reload_log_pane(self) -> None:
         log = self.query_one("#log", RichLog)
         log.clear()
         lines = self.logger.event_section_lines()
         if not any(line.strip() for line in lines):
-            log.write(
-                f"[{RP['muted']}]  No events yet — your actions will appear here. "
-                f"Press [b]h[/b] for help.[/]"
-            )
+            log.write(EMPTY_LOG_PLACEHOLDER)
             self._showing_placeholder = True
         else:
             for line in lines:
@@ -998,45 +1007,56 @@ class LoggingScreen(Screen):
             event.stop()
             event.prevent_default()
 
-    def handle_char(self, ch: str) -> bool:
+    def build_dispatch(self) -> None:
+        """Map each live key to its handler; on a clash the earlier entry wins."""
         cfg = self.logger.config
-        if ch == cfg.get("note_key", "n"):
-            self.open_inline("note")
-        elif ch == cfg.get("liquid_key", "l"):
-            self.open_inline("liquid")
-        elif ch == cfg.get("mark_key", "m"):
-            self.write_lines(self.logger.mark())
-        elif ch == cfg.get("undo_key", "u"):
-            self.action_undo()
-        elif ch == cfg.get("reload_key", "r"):
-            self.logger.reload_config()
-            self.refresh_hint()
-            self.app.notify("Config reloaded.", title="Config", severity="information")
-        elif ch == cfg.get("print_key", "p"):
-            self.reload_log_pane()
-        elif ch == "c":
-            self.action_set_rec()
-        elif ch == "/":
-            self.action_edit_metadata()
-        elif ch == "S":
-            self.action_settings()
-        elif ch == cfg.get("help_key", "h"):
-            self.action_help()
-        elif ch == cfg.get("stop_key", "q"):
-            self.action_end()
-        else:
-            for m in cfg.get("macros", []):
-                if ch == str(m.get("key", "")):
-                    self.run_macro(m)
-                    return True
+        bindings = [
+            (cfg.get("note_key", "n"), self.action_note),
+            (cfg.get("liquid_key", "l"), self.action_liquid),
+            (cfg.get("mark_key", "m"), self.action_mark),
+            (cfg.get("undo_key", "u"), self.action_undo),
+            (cfg.get("reload_key", "r"), self.action_reload),
+            (cfg.get("print_key", "p"), self.reload_log_pane),
+            ("c", self.action_set_rec),
+            ("/", self.action_edit_metadata),
+            ("S", self.action_settings),
+            (cfg.get("help_key", "h"), self.action_help),
+            (cfg.get("stop_key", "q"), self.action_end),
+        ]
+        dispatch = {}
+        for key, handler in bindings:
+            dispatch.setdefault(str(key), handler)
+        self._dispatch = dispatch
+
+    def handle_char(self, ch: str) -> bool:
+        handler = self._dispatch.get(ch)
+        if handler is not None:
+            handler()
+            return True
+        macro = self.logger.macro_index.get(ch)
+        if macro is None:
             return False
+        self.run_macro(*macro)
         return True
 
     # -- actions ------------------------------------------------------------- #
 
-    def run_macro(self, macro) -> None:
-        text = macro.get("text") or macro.get("label") or ""
-        upper = text.strip().upper()
+    def action_note(self) -> None:
+        self.open_inline("note")
+
+    def action_liquid(self) -> None:
+        self.open_inline("liquid")
+
+    def action_mark(self) -> None:
+        self.write_lines(self.logger.mark())
+
+    def action_reload(self) -> None:
+        self.logger.reload_config()
+        self.build_dispatch()
+        self.refresh_hint()
+        self.app.notify("Config reloaded.", title="Config", severity="information")
+
+    def run_macro(self, text: str, upper: str) -> None:
         if upper == "START TASK":
             self.app.push_screen(
                 TaskStartModal(self.logger.config.get("tasks", [])), self._after_task_start
@@ -1045,7 +1065,7 @@ class LoggingScreen(Screen):
             label = self.logger.current_task or "UNKNOWN"
             self.app.push_screen(TaskStopModal(label), self._after_task_stop)
         elif text:
-            self.write_lines(self.logger.append_entry(text))
+            self.write_lines(self.logger.append_entry(text, upper))
             if upper == "START RECORDING":
                 self._recording_active = True
                 self._flash_mood("rec_start")
@@ -1170,11 +1190,15 @@ class LoggingScreen(Screen):
 
     def _after_settings(self, saved) -> None:
         if saved:
+            self.build_dispatch()
             self.refresh_hint()
             self.refresh_status()
             self.app.notify("Settings saved.", title="Settings", severity="information")
 
     def action_help(self) -> None:
+        self.app.push_screen(HelpModal(self._help_text or self._build_help_text()))
+
+    def _build_help_text(self) -> str:
         cfg = self.logger.config
         lines = ["Macros:"]
         for m in cfg.get("macros", []):
@@ -1194,7 +1218,7 @@ class LoggingScreen(Screen):
             f"  {cfg.get('help_key', 'h')}   this help",
             f"  {cfg.get('stop_key', 'q')}   end session",
         ]
-        self.app.push_screen(HelpModal("\n".join(lines)))
+        return "\n".join(lines)
 
     def action_end(self) -> None:
         self.app.push_screen(EndSessionScreen(self.logger), self._after_end_decision)
@@ -1286,8 +1310,6 @@ class LabLogApp(App):
         try:
             await self._startup_flow()
         except Exception:
-            import traceback
-
             self.bell()
             self.exit(message="Startup error:\n" + traceback.format_exc())
 
@@ -1336,5 +1358,8 @@ class LabLogApp(App):
 
 
 def run_app(logger) -> int:
-    LabLogApp(logger).run()
+    try:
+        LabLogApp(logger).run()
+    finally:
+        logger.close_file()
     return 0